@@ -11,10 +11,16 @@ from urllib.parse import quote
 import geopandas as gpd
 import pandas as pd
 import requests
+import sqlite3
 import xml.etree.ElementTree as ET
 from functools import lru_cache
 import time
 
+try:
+    import orjson
+except ImportError:  # stdlib json is used instead
+    orjson = None
+
 app = Flask(__name__, static_folder='static')
 
 # Base URL for the site
@@ -75,6 +81,22 @@ def set_cached(key, data):
     """Store data in cache"""
     entsoe_cache[key] = (data, time.time())
 
+# ENTSO-E history database, written by entsoe_fetcher.py
+ENTSOE_DB_PATH = '/home/exedev/austria-grid/data/entsoe_data.db'
+
+def connect_db():
+    """Open a connection to the ENTSO-E database for memory-mapped reads; caller closes it"""
+    conn = sqlite3.connect(ENTSOE_DB_PATH)
+    conn.execute('PRAGMA mmap_size=268435456')
+    conn.execute('PRAGMA temp_store=MEMORY')
+    return conn
+
+def dump_json(data):
+    """Serialize data to JSON bytes with sorted keys, as jsonify does"""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_SORT_KEYS)
+    return json.dumps(data, sort_keys=True).encode()
+
 def parse_entsoe_xml(xml_text, value_key='quantity'):
     """Parse ENTSO-E XML response into structured data"""
     root = ET.fromstring(xml_text)
@@ -129,6 +151,9 @@ def fetch_entsoe(params):
 
 # Load data
 def load_json(filename):
+    if orjson is not None:
+        with open(f'data/{filename}', 'rb') as f:
+            return orjson.loads(f.read())
     with open(f'data/{filename}', 'r') as f:
         return json.load(f)
 
@@ -405,16 +430,13 @@ def entsoe_history():
     
     Returns time-series data for ML training and analysis.
     """
-    import sqlite3
-    
     data_type = request.args.get('type', 'load')
     days = min(int(request.args.get('days', 7)), 365)
     psr_type = request.args.get('psr_type')
     country = request.args.get('country')
     aggregation = request.args.get('aggregation', 'raw')
     
-    db_path = '/home/exedev/austria-grid/data/entsoe_data.db'
-    conn = sqlite3.connect(db_path)
+    conn = connect_db()
     
     cutoff = (datetime.now(timezone.utc) - timedelta(days=days)).isoformat()
     
@@ -547,11 +569,9 @@ def entsoe_history():
 @app.route('/api/entsoe/stats')
 def entsoe_stats():
     """Get database statistics for monitoring."""
-    import sqlite3
     import os
     
-    db_path = '/home/exedev/austria-grid/data/entsoe_data.db'
-    conn = sqlite3.connect(db_path)
+    conn = connect_db()
     
     stats = {}
     
@@ -594,7 +614,7 @@ def entsoe_stats():
     stats['prices'] = df.iloc[0].to_dict()
     
     # Database file size
-    stats['db_size_mb'] = round(os.path.getsize(db_path) / (1024 * 1024), 2)
+    stats['db_size_mb'] = round(os.path.getsize(ENTSOE_DB_PATH) / (1024 * 1024), 2)
     
     conn.close()
     return jsonify(stats)
@@ -613,10 +633,7 @@ def price_forecast():
     if cached:
         return jsonify(cached)
     
-    import sqlite3
-    
-    db_path = '/home/exedev/austria-grid/data/entsoe_data.db'
-    conn = sqlite3.connect(db_path)
+    conn = connect_db()
     
     # Get historical price patterns
     df = pd.read_sql_query("""
@@ -735,10 +752,7 @@ def price_patterns():
     Get historical price and load patterns for analysis.
     Shows hourly averages for weekdays vs weekends.
     """
-    import sqlite3
-    
-    db_path = '/home/exedev/austria-grid/data/entsoe_data.db'
-    conn = sqlite3.connect(db_path)
+    conn = connect_db()
     
     # Price patterns
     prices = pd.read_sql_query("SELECT timestamp, price_eur_mwh FROM prices WHERE price_eur_mwh > 0", conn)
@@ -777,16 +791,17 @@ def price_patterns():
 @app.route('/api/substation-loads')
 def substation_loads():
     """Get estimated load on each substation based on live data"""
+    # Cached as serialized JSON; the payload is large and identical between hits
     cache_key = 'substation_loads'
     cached = get_cached(cache_key)
     if cached:
-        return jsonify(cached)
+        return Response(cached, mimetype='application/json')
     
     try:
         from substation_load_model import get_substation_loads_json
-        result = get_substation_loads_json()
-        set_cached(cache_key, result)
-        return jsonify(result)
+        body = dump_json(get_substation_loads_json())
+        set_cached(cache_key, body)
+        return Response(body, mimetype='application/json')
     except Exception as e:
         import traceback
         return jsonify({'error': str(e), 'trace': traceback.format_exc()}), 500
@@ -795,10 +810,11 @@ def substation_loads():
 @app.route('/api/power-plants')
 def all_power_plants():
     """Get all power plants with current production estimates"""
+    # Cached as serialized JSON, like /api/substation-loads
     cache_key = 'power_plants'
     cached = get_cached(cache_key)
     if cached:
-        return jsonify(cached)
+        return Response(cached, mimetype='application/json')
     
     try:
         data = load_json('all_power_plants.json')
@@ -811,33 +827,16 @@ def all_power_plants():
         model.calculate_utilization_factors()
         model.estimate_plant_production()
         
-        plants = model.get_all_plants()
-        
         result = {
             'timestamp': datetime.now(timezone.utc).isoformat(),
-            'plants': plants,
+            'plants': model.get_all_plants(),
             'utilization_factors': model.utilization_factors,
-            'summary': {
-                'total_plants': len(plants),
-                'total_capacity_mw': sum(p['capacity_mw'] for p in plants),
-                'total_production_mw': sum(p['production_mw'] for p in plants),
-                'by_source': {}
-            }
+            'summary': model.get_plant_summary(),
         }
         
-        # Group by source
-        for plant in plants:
-            src = plant['source']
-            if src not in result['summary']['by_source']:
-                result['summary']['by_source'][src] = {
-                    'count': 0, 'capacity_mw': 0, 'production_mw': 0
-                }
-            result['summary']['by_source'][src]['count'] += 1
-            result['summary']['by_source'][src]['capacity_mw'] += plant['capacity_mw']
-            result['summary']['by_source'][src]['production_mw'] += plant['production_mw']
-        
-        set_cached(cache_key, result)
-        return jsonify(result)
+        body = dump_json(result)
+        set_cached(cache_key, body)
+        return Response(body, mimetype='application/json')
     except Exception as e:
         import traceback
         return jsonify({'error': str(e), 'trace': traceback.format_exc()}), 500
@@ -1129,11 +1128,10 @@ Sitemap: {BASE_URL}/sitemap.xml
 @app.route('/api/price-statistics')
 def price_statistics():
     """Price volatility and statistics from historical ENTSO-E data"""
-    import sqlite3
     from datetime import datetime, timedelta
     
     try:
-        conn = sqlite3.connect('data/entsoe_data.db')
+        conn = connect_db()
         cursor = conn.cursor()
         
         # Get price statistics
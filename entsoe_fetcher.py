@@ -39,6 +39,9 @@ def init_db():
     conn = sqlite3.connect(DB_PATH)
     c = conn.cursor()
     
+    # WAL (persistent) lets the API keep reading while fetches write
+    c.execute('PRAGMA journal_mode=WAL')
+    
     # Generation by type (15-min resolution)
     c.execute('''
         CREATE TABLE IF NOT EXISTS generation (
@@ -105,11 +108,15 @@ def init_db():
     
     # Create indexes for efficient time-series queries
     c.execute('CREATE INDEX IF NOT EXISTS idx_generation_timestamp ON generation(timestamp)')
-    c.execute('CREATE INDEX IF NOT EXISTS idx_generation_psr_type ON generation(psr_type)')
     c.execute('CREATE INDEX IF NOT EXISTS idx_load_timestamp ON load(timestamp)')
     c.execute('CREATE INDEX IF NOT EXISTS idx_prices_timestamp ON prices(timestamp)')
     c.execute('CREATE INDEX IF NOT EXISTS idx_crossborder_timestamp ON cross_border_flows(timestamp)')
-    c.execute('CREATE INDEX IF NOT EXISTS idx_crossborder_country ON cross_border_flows(country_code)')
+    # Per-series range scans (/api/entsoe/history with psr_type or country)
+    c.execute('CREATE INDEX IF NOT EXISTS idx_generation_psr_type_timestamp ON generation(psr_type, timestamp)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_crossborder_country_timestamp ON cross_border_flows(country_code, timestamp)')
+    # Superseded by the composite indexes above (leading-column prefixes)
+    c.execute('DROP INDEX IF EXISTS idx_generation_psr_type')
+    c.execute('DROP INDEX IF EXISTS idx_crossborder_country')
     
     conn.commit()
     conn.close()
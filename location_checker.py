@@ -5,18 +5,57 @@ Provides information about grid connection possibilities at a given location.
 Includes PVGIS integration for accurate solar yield estimates.
 """
 
+import heapq
 import json
 import math
+import multiprocessing
+import os
+import re
+import numpy as np
 import requests
 from typing import Dict, List, Optional
 from functools import lru_cache
 
+from substation_load_model import load_cached
+
+try:
+    from sklearn.neighbors import BallTree
+except ImportError:  # check_location scans the full arrays instead
+    BallTree = None
+
+try:
+    import orjson
+except ImportError:  # stdlib json is used instead
+    orjson = None
+
 DATA_DIR = '/home/exedev/austria-grid/data'
+CACHE_NAME = 'location_checker_cache.pkl'
+
+# Source files parsed by LocationChecker.load_data (cache is keyed on their mtimes)
+SOURCE_FILES = (
+    'transformer_stations.json',
+    'osm_substations.json',
+    'wind_turbines_enhanced.json',
+    'all_power_plants.json',
+)
+# Bump when the cached row layout changes
+CACHE_VERSION = 3
+
+# Field order of the row tuples kept in LocationChecker.transformers / .substations;
+# dicts are only built for the few rows returned by check_location
+TRANSFORMER_FIELDS = ('name', 'lat', 'lon', 'operator', 'available_mw', 'booked_mw', 'contact', 'website')
+SUBSTATION_FIELDS = ('name', 'lat', 'lon', 'voltage', 'operator')
 
 # PVGIS API configuration
 PVGIS_BASE_URL = 'https://re.jrc.ec.europa.eu/api/v5_2'
 
+# Leading integer of an OSM voltage tag ("380000;220000", "110 kV", ...)
+_VOLT_RE = re.compile(r'\s*(\d+)')
+
 def load_json(filename):
+    if orjson is not None:
+        with open(f'{DATA_DIR}/{filename}', 'rb') as f:
+            return orjson.loads(f.read())
     with open(f'{DATA_DIR}/{filename}', 'r') as f:
         return json.load(f)
 
@@ -29,14 +68,20 @@ def parse_capacity(val):
     except:
         return 0
 
-def haversine_distance(lat1, lon1, lat2, lon2):
-    """Calculate distance between two points in km."""
-    R = 6371
-    lat1, lon1, lat2, lon2 = map(math.radians, [lat1, lon1, lat2, lon2])
-    dlat = lat2 - lat1
-    dlon = lon2 - lon1
-    a = math.sin(dlat/2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon/2)**2
-    return R * 2 * math.asin(math.sqrt(a))
+EARTH_RADIUS_KM = 6371
+DEG_TO_RAD = math.pi / 180
+
+def haversine_from_point(lat1, lon1, lat2, lon2):
+    """
+    Haversine distance in km from one point to arrays of points. Only the
+    origin (lat1, lon1) may be scalar; lat2/lon2 are arrays of degrees.
+    """
+    lat1 = lat1 * DEG_TO_RAD
+    lat2 = lat2 * DEG_TO_RAD
+    sdlat = np.sin((lat2 - lat1) * 0.5)
+    sdlon = np.sin((lon2 - lon1) * DEG_TO_RAD * 0.5)
+    a = sdlat * sdlat + math.cos(lat1) * np.cos(lat2) * sdlon * sdlon
+    return 2 * EARTH_RADIUS_KM * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
 
 def get_region(lat: float, lon: float) -> str:
     """Determine Austrian region from coordinates."""
@@ -172,6 +217,71 @@ def get_pvgis_data(lat: float, lon: float, peakpower: float = 10.0, loss: float
         return None
 
 
+def _regional_recommendations(region: str, wind_cf: float, solar_cf: float) -> tuple:
+    """Build the recommendations that depend only on the region's capacity factors."""
+    recs = []
+    
+    # New law information (Günstiger-Strom-Gesetz / ElWG 2025)
+    recs.append({
+        'type': 'law',
+        'rating': 'info',
+        'text': 'NEU: Günstiger-Strom-Gesetz (ElWG) seit 1.1.2026 in Kraft',
+    })
+    
+    # Solar recommendations
+    if solar_cf >= 0.11:
+        recs.append({
+            'type': 'solar',
+            'rating': 'good',
+            'text': f'Gute Sonneneinstrahlung in {region} ({solar_cf*100:.0f}% Kapazitätsfaktor)',
+        })
+    
+    # Wind recommendations
+    if wind_cf >= 0.25:
+        recs.append({
+            'type': 'wind',
+            'rating': 'excellent',
+            'text': f'Ausgezeichnete Windverhältnisse ({wind_cf*100:.0f}% Kapazitätsfaktor)',
+        })
+    elif wind_cf >= 0.20:
+        recs.append({
+            'type': 'wind',
+            'rating': 'good',
+            'text': f'Gute Windverhältnisse ({wind_cf*100:.0f}% Kapazitätsfaktor)',
+        })
+    else:
+        recs.append({
+            'type': 'wind',
+            'rating': 'moderate',
+            'text': f'Mäßige Windverhältnisse ({wind_cf*100:.0f}% Kapazitätsfaktor)',
+        })
+    
+    return tuple(recs)
+
+
+# Region-dependent recommendations, built once from the capacity factor tables
+REGION_RECOMMENDATIONS = {
+    region: _regional_recommendations(region, wind_cf, SOLAR_CAPACITY_FACTORS.get(region, 0.11))
+    for region, wind_cf in WIND_CAPACITY_FACTORS.items()
+}
+
+
+# Per worker process: (checker, external) set by _init_batch_worker
+_worker_args = None
+
+
+def _init_batch_worker(checker, external):
+    """Pool initializer; with fork the checker is inherited, never pickled."""
+    global _worker_args
+    _worker_args = (checker, external)
+
+
+def _check_location_worker(latlon):
+    """Pool worker for LocationChecker.check_locations_batch."""
+    checker, external = _worker_args
+    return checker.check_location(*latlon, external=external)
+
+
 class LocationChecker:
     def __init__(self):
         self.transformers = []
@@ -179,24 +289,34 @@ class LocationChecker:
         self.wind_turbines = []
         self.solar_plants = []
         self.load_data()
+        self._build_arrays()
     
     def load_data(self):
-        """Load all relevant data."""
+        """Load all relevant data, reusing the parsed cache if sources are unchanged."""
+        def parse():
+            self._parse_data()
+            return self.transformers, self.substations, self.wind_turbines, self.solar_plants
+        
+        self.transformers, self.substations, self.wind_turbines, self.solar_plants = load_cached(
+            CACHE_NAME, SOURCE_FILES, parse, version=CACHE_VERSION, data_dir=DATA_DIR)
+    
+    def _parse_data(self):
+        """Parse all relevant data from the JSON sources."""
         # Load transformer stations (with grid operator and capacity)
         try:
             data = load_json('transformer_stations.json')
             for t in data:
                 if t.get('latitude') and t.get('longitude'):
-                    self.transformers.append({
-                        'name': t.get('substationName', 'Unknown'),
-                        'lat': t['latitude'],
-                        'lon': t['longitude'],
-                        'operator': t.get('networkOperator', 'Unknown'),
-                        'available_mw': parse_capacity(t.get('availableCapacity')),
-                        'booked_mw': parse_capacity(t.get('bookedCapacity')),
-                        'contact': t.get('contact', ''),
-                        'website': t.get('website', ''),
-                    })
+                    self.transformers.append((
+                        t.get('substationName', 'Unknown'),
+                        t['latitude'],
+                        t['longitude'],
+                        t.get('networkOperator', 'Unknown'),
+                        parse_capacity(t.get('availableCapacity')),
+                        parse_capacity(t.get('bookedCapacity')),
+                        t.get('contact', ''),
+                        t.get('website', ''),
+                    ))
         except Exception as e:
             print(f"Error loading transformers: {e}")
         
@@ -209,24 +329,20 @@ class LocationChecker:
                 if f['geometry']['type'] == 'Point':
                     lon, lat = coords
                 else:
-                    lon = sum(c[0] for c in coords[0]) / len(coords[0])
-                    lat = sum(c[1] for c in coords[0]) / len(coords[0])
+                    lon, lat = np.asarray(coords[0], dtype=np.float64).mean(axis=0)[:2].tolist()
                 
-                voltage = props.get('voltage', 110)
-                try:
-                    voltage = int(str(voltage).split(';')[0].replace('kV', ''))
-                    if voltage > 1000:
-                        voltage //= 1000
-                except:
-                    voltage = 110
+                m = _VOLT_RE.match(str(props.get('voltage', 110)))
+                voltage = int(m.group(1)) if m else 110
+                if voltage > 1000:
+                    voltage //= 1000
                 
-                self.substations.append({
-                    'name': props.get('name', 'Unknown'),
-                    'lat': lat,
-                    'lon': lon,
-                    'voltage': voltage,
-                    'operator': props.get('operator', ''),
-                })
+                self.substations.append((
+                    props.get('name', 'Unknown'),
+                    lat,
+                    lon,
+                    voltage,
+                    props.get('operator', ''),
+                ))
         except Exception as e:
             print(f"Error loading substations: {e}")
         
@@ -239,7 +355,6 @@ class LocationChecker:
                         'lat': t['lat'],
                         'lon': t['lon'],
                         'capacity_mw': t.get('estimated_mw', 3.0),
-                        'name': t.get('name', 'Wind Turbine'),
                     })
         except Exception as e:
             print(f"Error loading wind turbines: {e}")
@@ -258,46 +373,89 @@ class LocationChecker:
         except Exception as e:
             print(f"Error loading solar: {e}")
     
-    def check_location(self, lat: float, lon: float) -> Dict:
-        """Check feasibility of wind/solar installation at given location."""
+    def _build_arrays(self):
+        """Coordinate (and capacity) arrays parallel to the loaded rows."""
+        def column(rows, get):
+            return np.array([get(r) for r in rows], dtype=np.float64)
+        
+        self.transformer_lat = column(self.transformers, lambda t: t[1])
+        self.transformer_lon = column(self.transformers, lambda t: t[2])
+        
+        # Only HV (220 kV+) substations are ever searched
+        self.hv_rows = np.array([i for i, s in enumerate(self.substations) if s[3] >= 220], dtype=np.intp)
+        self.hv_lat = column((self.substations[i] for i in self.hv_rows), lambda s: s[1])
+        self.hv_lon = column((self.substations[i] for i in self.hv_rows), lambda s: s[2])
+        
+        self.wind_lat = column(self.wind_turbines, lambda t: t['lat'])
+        self.wind_lon = column(self.wind_turbines, lambda t: t['lon'])
+        self.wind_mw = column(self.wind_turbines, lambda t: t['capacity_mw'])
+        
+        self.solar_lat = column(self.solar_plants, lambda s: s['lat'])
+        self.solar_lon = column(self.solar_plants, lambda s: s['lon'])
+        self.solar_mw = column(self.solar_plants, lambda s: s['capacity_mw'] or 0)
+        
+        # Spatial indexes for the radius searches in check_location
+        self._trees = {}
+        if BallTree is not None:
+            for name in ('transformer', 'hv', 'wind', 'solar'):
+                lat, lon = getattr(self, f'{name}_lat'), getattr(self, f'{name}_lon')
+                if len(lat):
+                    self._trees[name] = BallTree(np.radians(np.column_stack([lat, lon])),
+                                                 metric='haversine')
+    
+    def _within(self, name: str, lat: float, lon: float, radius_km: float):
+        """
+        Rows of the `name` arrays closer than radius_km to (lat, lon), in
+        ascending row order, and their haversine_from_point distances.
+        """
+        lat_arr, lon_arr = getattr(self, f'{name}_lat'), getattr(self, f'{name}_lon')
+        tree = self._trees.get(name)
+        if tree is None:
+            rows = np.arange(len(lat_arr))
+        else:
+            # Slightly widened so the exact cut below decides boundary cases
+            point = np.radians([[lat, lon]])
+            rows = np.sort(tree.query_radius(point, r=radius_km * (1 + 1e-9) / EARTH_RADIUS_KM)[0])
+        dist = haversine_from_point(lat, lon, lat_arr[rows], lon_arr[rows])
+        near = dist < radius_km
+        return rows[near], dist[near]
+    
+    def check_location(self, lat: float, lon: float, external: bool = True) -> Dict:
+        """
+        Check feasibility of wind/solar installation at given location.
+        
+        With external=False the PVGIS and INSPIRE lookups are skipped and
+        'pvgis' / 'environmental' are None.
+        """
         
         region = get_region(lat, lon)
         
-        # Find nearest transformers with capacity
-        nearby_transformers = []
-        for t in self.transformers:
-            dist = haversine_distance(lat, lon, t['lat'], t['lon'])
-            if dist < 30:  # Within 30km
-                nearby_transformers.append({
-                    **t,
-                    'distance_km': round(dist, 1),
-                })
+        # Find nearest transformers with capacity (ties keep file order)
+        rows, dist = self._within('transformer', lat, lon, 30)  # Within 30km
+        candidates = [(round(d, 1), i) for d, i in zip(dist.tolist(), rows.tolist())]
         
-        nearby_transformers.sort(key=lambda x: x['distance_km'])
+        nearby_transformers = [
+            {**dict(zip(TRANSFORMER_FIELDS, self.transformers[i])), 'distance_km': dist}
+            for dist, i in heapq.nsmallest(5, candidates)
+        ]
         
         # Find nearest HV substations (220kV+)
-        nearby_hv = []
-        for s in self.substations:
-            if s['voltage'] >= 220:
-                dist = haversine_distance(lat, lon, s['lat'], s['lon'])
-                if dist < 50:
-                    nearby_hv.append({
-                        **s,
-                        'distance_km': round(dist, 1),
-                    })
+        rows, dist = self._within('hv', lat, lon, 50)
+        candidates = [(round(d, 1), i) for d, i in zip(dist.tolist(), self.hv_rows[rows].tolist())]
         
-        nearby_hv.sort(key=lambda x: x['distance_km'])
+        nearby_hv = [
+            {**dict(zip(SUBSTATION_FIELDS, self.substations[i])), 'distance_km': dist}
+            for dist, i in heapq.nsmallest(3, candidates)
+        ]
         
         # Count nearby installations
-        wind_nearby = sum(1 for t in self.wind_turbines 
-                        if haversine_distance(lat, lon, t['lat'], t['lon']) < 10)
-        wind_capacity_nearby = sum(t['capacity_mw'] for t in self.wind_turbines 
-                                  if haversine_distance(lat, lon, t['lat'], t['lon']) < 10)
+        near, _ = self._within('wind', lat, lon, 10)
+        wind_nearby = len(near)
+        wind_capacity_nearby = float(self.wind_mw[near].sum())
         
-        solar_nearby = sum(1 for s in self.solar_plants 
-                         if haversine_distance(lat, lon, s['lat'], s['lon']) < 10)
-        solar_capacity_nearby = sum((s['capacity_mw'] or 0) for s in self.solar_plants 
-                                   if haversine_distance(lat, lon, s['lat'], s['lon']) < 10)
+        near, _ = self._within('solar', lat, lon, 10)
+        solar_nearby = len(near)
+        solar_capacity_nearby = float(self.solar_mw[near].sum())
         
         # Calculate grid connection difficulty
         best_transformer = nearby_transformers[0] if nearby_transformers else None
@@ -331,7 +489,7 @@ class LocationChecker:
         wind_3mw_annual_mwh = 3 * wind_cf * 8760
         
         # INSPIRE spatial checks (protected areas, wind exclusion, Natura 2000)
-        environmental_constraints = self._check_environmental_constraints(lat, lon)
+        environmental_constraints = self._check_environmental_constraints(lat, lon) if external else None
         
         result = {
             'location': {
@@ -343,8 +501,8 @@ class LocationChecker:
                 'difficulty': connection_difficulty,
                 'color': connection_color,
                 'nearest_transformer': best_transformer,
-                'nearby_transformers': nearby_transformers[:5],
-                'nearby_hv_substations': nearby_hv[:3],
+                'nearby_transformers': nearby_transformers,
+                'nearby_hv_substations': nearby_hv,
                 'grid_operator': best_transformer['operator'] if best_transformer else 'Unknown',
             },
             'nearby_installations': {
@@ -364,7 +522,7 @@ class LocationChecker:
                 'wind_3mw_annual_mwh': round(wind_3mw_annual_mwh),
                 'wind_3mw_annual_eur': round(wind_3mw_annual_mwh * 80),  # ~80€/MWh
             },
-            'pvgis': get_pvgis_data(lat, lon, 10.0),  # Real PVGIS data for 10kW system
+            'pvgis': get_pvgis_data(lat, lon, 10.0) if external else None,  # Real PVGIS data for 10kW system
             'environmental': environmental_constraints,
             'recommendations': self._get_recommendations(
                 region, connection_difficulty, wind_cf, solar_cf, wind_nearby,
@@ -378,6 +536,7 @@ class LocationChecker:
         }
         
         # Downgrade grid connection if in protected area or wind exclusion zone
+        environmental_constraints = environmental_constraints or {}
         if environmental_constraints.get('protected_area') and environmental_constraints['protected_area']['distance_m'] == 0:
             if result['grid_connection']['difficulty'] in ('easy', 'medium'):
                 result['grid_connection']['difficulty'] = 'restricted'
@@ -389,6 +548,33 @@ class LocationChecker:
         
         return result
     
+    def check_locations_batch(self, latlons, processes: Optional[int] = None,
+                              external: bool = False) -> List[Dict]:
+        """
+        Check many locations in parallel (e.g. a grid of points for a heat map).
+        
+        Args:
+            latlons: Sequence of (lat, lon) pairs
+            processes: Number of worker processes (default: CPU count)
+            external: Also query PVGIS and INSPIRE per point (off by default,
+                so workers don't fan out requests to the external APIs)
+        
+        Returns:
+            List of check_location results in input order
+        """
+        latlons = list(latlons)
+        try:
+            ctx = multiprocessing.get_context('fork')
+        except ValueError:
+            # No fork on this platform - the loaded data can't be shared cheaply
+            return [self.check_location(lat, lon, external=external) for lat, lon in latlons]
+        
+        processes = processes or os.cpu_count() or 1
+        chunksize = max(1, len(latlons) // (processes * 4))
+        
+        with ctx.Pool(processes, initializer=_init_batch_worker, initargs=(self, external)) as pool:
+            return pool.map(_check_location_worker, latlons, chunksize=chunksize)
+    
     def _check_environmental_constraints(self, lat: float, lon: float) -> Dict:
         """Check INSPIRE geodata for environmental constraints at location."""
         try:
@@ -455,40 +641,11 @@ class LocationChecker:
                     'text': '✅ Keine Schutzgebiete oder Ausschlusszonen am Standort',
                 })
         
-        # New law information (Günstiger-Strom-Gesetz / ElWG 2025)
-        recs.append({
-            'type': 'law',
-            'rating': 'info',
-            'text': 'NEU: Günstiger-Strom-Gesetz (ElWG) seit 1.1.2026 in Kraft',
-        })
-        
-        # Solar recommendations
-        if solar_cf >= 0.11:
-            recs.append({
-                'type': 'solar',
-                'rating': 'good',
-                'text': f'Gute Sonneneinstrahlung in {region} ({solar_cf*100:.0f}% Kapazitätsfaktor)',
-            })
-        
-        # Wind recommendations
-        if wind_cf >= 0.25:
-            recs.append({
-                'type': 'wind',
-                'rating': 'excellent',
-                'text': f'Ausgezeichnete Windverhältnisse ({wind_cf*100:.0f}% Kapazitätsfaktor)',
-            })
-        elif wind_cf >= 0.20:
-            recs.append({
-                'type': 'wind',
-                'rating': 'good',
-                'text': f'Gute Windverhältnisse ({wind_cf*100:.0f}% Kapazitätsfaktor)',
-            })
-        else:
-            recs.append({
-                'type': 'wind',
-                'rating': 'moderate',
-                'text': f'Mäßige Windverhältnisse ({wind_cf*100:.0f}% Kapazitätsfaktor)',
-            })
+        # Law, solar and wind recommendations depend only on the region
+        base = REGION_RECOMMENDATIONS.get(region)
+        if base is None:
+            base = _regional_recommendations(region, wind_cf, solar_cf)
+        recs.extend(dict(r) for r in base)
         
         # Grid connection
         if difficulty == 'easy':
@@ -613,10 +770,27 @@ class LocationChecker:
         pass
 
 
+def get_checker() -> 'LocationChecker':
+    """
+    Process-wide LocationChecker. Data and trees are rebuilt only when one
+    of the source files changes.
+    """
+    try:
+        sources_key = tuple(os.path.getmtime(f'{DATA_DIR}/{f}') for f in SOURCE_FILES)
+    except OSError:
+        sources_key = None
+    return _shared_checker(sources_key)
+
+
+@lru_cache(maxsize=1)
+def _shared_checker(sources_key) -> 'LocationChecker':
+    """Build the shared checker for one set of source mtimes (see get_checker)."""
+    return LocationChecker()
+
+
 def check_location_api(lat: float, lon: float) -> Dict:
     """API function to check a location."""
-    checker = LocationChecker()
-    return checker.check_location(lat, lon)
+    return get_checker().check_location(lat, lon)
 
 
 if __name__ == '__main__':
@@ -12,17 +12,45 @@ This model estimates the load on each substation (Umspannwerk/UW) by:
 The model provides real-time estimates that update with ENTSO-E data.
 """
 
+from bisect import bisect_right
 import json
-import sqlite3
-import math
 from datetime import datetime, timezone
 import os
-import requests
+import pickle
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+import numpy as np
+
+try:
+    import orjson
+except ImportError:  # stdlib json is used instead
+    orjson = None
+
+try:
+    from sklearn.neighbors import BallTree
+except ImportError:  # fall back to a brute-force scan in nearest_neighbors()
+    BallTree = None
 
 # Paths
 DATA_DIR = '/home/exedev/austria-grid/data'
 DB_PATH = f'{DATA_DIR}/entsoe_data.db'
 
+EARTH_RADIUS_KM = 6371
+
+# Rows per block of the brute-force distance matrix when sklearn is missing
+NEAREST_CHUNK = 512
+
+# Parsed-data caches are pickled next to the sources; bump when the
+# cached objects change shape so stale caches are rebuilt
+CACHE_VERSION = 4
+PLANT_SOURCE_FILES = ('all_power_plants.json', 'hydropower_plants.json', 'wind_turbines_enhanced.json')
+SUBSTATION_SOURCE_FILES = ('osm_substations.json', 'transformer_stations.json')
+
+# Leading number of an OSM voltage tag ("380000;220000", "110 kV", ...)
+_VOLT_RE = re.compile(r'\s*(\d+(?:\.\d+)?)')
+
 # ENTSO-E generation type mapping to our source categories
 ENTSOE_TO_SOURCE = {
     'Hydro Run-of-river and poundage': 'hydro_run_of_river',
@@ -51,22 +79,257 @@ ENTSOE_TO_SOURCE = {
     'Andere erneuerbare': 'other',
 }
 
+# Source categories produced by fetch_power_plants.categorize_source; the index
+# is the integer source id used by the model's per-plant arrays
+SOURCES = (
+    'hydro_run_of_river', 'hydro_reservoir', 'hydro_pumped', 'wind', 'solar',
+    'gas', 'coal', 'oil', 'biomass', 'waste', 'nuclear', 'geothermal', 'other',
+)
+SOURCE_TO_ID = {src: i for i, src in enumerate(SOURCES)}
+
+# ENTSO-E types in a fixed order and the source id each one maps to
+ENTSOE_TYPES = tuple(ENTSOE_TO_SOURCE)
+ENTSOE_SOURCE_IDS = np.array([SOURCE_TO_ID[ENTSOE_TO_SOURCE[t]] for t in ENTSOE_TYPES], dtype=np.int8)
+
+# Utilization assumed for sources with capacity but no ENTSO-E data
+DEFAULT_UTILIZATION = {
+    'hydro_run_of_river': 0.05,
+    'hydro_reservoir': 0.10,
+    'hydro_pumped': 0.02,
+    'wind': 0.04,
+    'solar': 0.0,
+    'gas': 0.28,
+    'coal': 0.0,
+    'biomass': 0.80,
+    'waste': 0.36,
+    'other': 0.30,
+}
+DEFAULT_UTIL_BY_SRC_ID = np.array([DEFAULT_UTILIZATION.get(src, 0.1) for src in SOURCES])
+
+# Regions returned by SubstationLoadModel._get_region_ids; the index is the region id
+REGIONS = (
+    'Wien', 'Niederösterreich', 'Oberösterreich', 'Steiermark', 'Vorarlberg',
+    'Tirol', 'Salzburg', 'Kärnten', 'Burgenland',
+)
+REGION_TO_ID = {region: i for i, region in enumerate(REGIONS)}
+
+# Estimated substation capacity by voltage tier: below 220 kV, 220 kV+, 380 kV+
+VOLTAGE_TIERS_KV = (220, 380)
+TIER_CAPACITY_MVA = np.array([300, 750, 2000], dtype=np.int16)
+
+# Substation status labels indexed by the codes in SubstationLoadModel.sub_status;
+# codes 0-2 are the load buckets split at STATUS_THRESHOLDS (% of capacity)
+STATUS_LABELS = np.array(['low', 'medium', 'high', 'unknown'])
+STATUS_THRESHOLDS = (50, 80)
+STATUS_UNKNOWN = 3
+
 def load_json(filename):
-    with open(f'{DATA_DIR}/{filename}', 'r') as f:
+    path = f'{DATA_DIR}/{filename}'
+    if orjson is not None:
+        with open(path, 'rb') as f:
+            return orjson.loads(f.read())
+    with open(path, 'r') as f:
         return json.load(f)
 
-def haversine_distance(lat1, lon1, lat2, lon2):
-    """Calculate distance between two points in km."""
-    R = 6371
-    lat1, lon1, lat2, lon2 = map(math.radians, [lat1, lon1, lat2, lon2])
-    dlat = lat2 - lat1
-    dlon = lon2 - lon1
-    a = math.sin(dlat/2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon/2)**2
-    return R * 2 * math.asin(math.sqrt(a))
+def load_cached(cache_name, source_files, build, version=CACHE_VERSION, data_dir=DATA_DIR):
+    """
+    Return build(), pickled to data_dir/cache_name and reused while the
+    modification times of data_dir/source_files (and the cache version)
+    are unchanged.
+    """
+    cache_path = f'{data_dir}/{cache_name}'
+    try:
+        key = (version,) + tuple(os.path.getmtime(f'{data_dir}/{f}') for f in source_files)
+    except OSError:
+        return build()
+    
+    if os.path.exists(cache_path):
+        try:
+            with open(cache_path, 'rb') as f:
+                cached_key, value = pickle.load(f)
+            if cached_key == key:
+                return value
+        except Exception as e:
+            print(f"Ignoring unreadable cache {cache_name}: {e}")
+    
+    value = build()
+    # Written aside and swapped in, so other processes never read a partial file
+    tmp_path = f'{cache_path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    try:
+        with open(tmp_path, 'wb') as f:
+            pickle.dump((key, value), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        print(f"Could not write cache {cache_name}: {e}")
+    return value
+
+@lru_cache(maxsize=1)
+def _http_session():
+    """
+    Shared HTTP session so the local ENTSO-E API connections are kept alive
+    across fetches and model runs. requests is imported on first use only.
+    """
+    import requests
+    return requests.Session()
+
+def fetch_entsoe(url):
+    """
+    GET a local ENTSO-E API endpoint and return its parsed JSON, or None on a
+    non-200 status. The endpoints cache their own responses (see app.py).
+    """
+    response = _http_session().get(url, timeout=15)
+    if response.status_code != 200:
+        return None
+    return response.json()
+
+def haversine_vec(lat1, lon1, lat2, lon2):
+    """Vectorized haversine distance in km; accepts scalars or broadcastable arrays."""
+    lat1, lon1, lat2, lon2 = (np.radians(x) for x in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2)**2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2)**2
+    return EARTH_RADIUS_KM * 2 * np.arcsin(np.sqrt(a))
+
+def nearest_neighbors(points_rad, targets_rad):
+    """
+    Find the nearest target for each point by great-circle distance.
+    
+    Args:
+        points_rad: (N, 2) array of [lat, lon] in radians
+        targets_rad: (M, 2) array of [lat, lon] in radians
+    
+    Returns:
+        (idx, dist_km) arrays of length N
+    """
+    if BallTree is not None:
+        dist, idx = BallTree(targets_rad, metric='haversine').query(points_rad, k=1)
+        return idx[:, 0], dist[:, 0] * EARTH_RADIUS_KM
+    
+    # Without sklearn, evaluate the distance matrix in row blocks to bound memory
+    p_lat, p_lon = np.degrees(points_rad).T
+    t_lat, t_lon = np.degrees(targets_rad).T
+    idx = np.empty(len(p_lat), dtype=np.intp)
+    dist = np.empty(len(p_lat))
+    for start in range(0, len(p_lat), NEAREST_CHUNK):
+        block = slice(start, start + NEAREST_CHUNK)
+        d = haversine_vec(p_lat[block, None], p_lon[block, None], t_lat[None, :], t_lon[None, :])
+        idx[block] = d.argmin(axis=1)
+        dist[block] = d[np.arange(len(d)), idx[block]]
+    return idx, dist
+
+def assign_nearest(plant_lat, plant_lon, plant_cap, sub_lat, sub_lon, sub_volt):
+    """
+    Pick the substation each plant connects to.
+    
+    Large plants (> 50 MW) connect to the nearest HV (>= 220 kV) substation
+    within 50 km, others to the nearest >= 110 kV substation within 30 km.
+    
+    Returns:
+        (assigned_idx, assigned_dist) arrays; index -1 / distance inf if unassigned
+    """
+    assigned_idx = np.full(len(plant_lat), -1, dtype=np.intp)
+    assigned_dist = np.full(len(plant_lat), np.inf)
+    if len(plant_lat) == 0:
+        return assigned_idx, assigned_dist
+    
+    plant_rad = np.radians(np.column_stack([plant_lat, plant_lon]))
+    sub_rad = np.radians(np.column_stack([sub_lat, sub_lon])).reshape(-1, 2)
+    is_large = plant_cap > 50
+    
+    for plant_mask, sub_mask, max_dist in ((is_large, sub_volt >= 220, 50),
+                                           (~is_large, sub_volt >= 110, 30)):
+        if not plant_mask.any() or not sub_mask.any():
+            continue
+        sub_idx = np.flatnonzero(sub_mask)
+        idx, dist = nearest_neighbors(plant_rad[plant_mask], sub_rad[sub_mask])
+        hit = dist < max_dist
+        rows = np.flatnonzero(plant_mask)[hit]
+        assigned_idx[rows] = sub_idx[idx[hit]]
+        assigned_dist[rows] = dist[hit]
+    
+    return assigned_idx, assigned_dist
+
+def grid_key(lat, lon):
+    """Integer key of the ~100 m (0.001°) grid cell containing each coordinate."""
+    lat_q = np.round(np.asarray(lat) * 1000).astype(np.int64)
+    lon_q = np.round(np.asarray(lon) * 1000).astype(np.int64)
+    return lat_q * 1_000_000 + lon_q
+
+@lru_cache(maxsize=None)
+def parse_voltage_tag(v):
+    """Integer kV of a raw voltage tag; memoized as tags repeat heavily."""
+    m = _VOLT_RE.match(v)
+    if not m:
+        return 380
+    v_int = int(float(m.group(1)))
+    if v_int > 1000:
+        v_int = v_int // 1000
+    return v_int
+
+def _polygon_centroid(coords):
+    """Vertex mean (lon, lat) of a polygon ring."""
+    lon, lat = np.asarray(coords, dtype=np.float64).mean(axis=0)[:2]
+    return float(lon), float(lat)
+
+
+def _plant_keys(plants):
+    """grid_key of each plant's location."""
+    return grid_key(np.array([p.lat for p in plants], dtype=np.float64),
+                    np.array([p.lon for p in plants], dtype=np.float64))
+
+def _first_per_key(keys, rows):
+    """(unique keys, the first of rows carrying each key), both sorted by key."""
+    ukeys, first = np.unique(keys[rows], return_index=True)
+    return ukeys, rows[first]
+
+def merge_plants(osm_plants, hydro_plants, hydro_is_ror, wind_plants):
+    """
+    Merge the plant sources into one plant per ~100 m grid cell (see grid_key).
+    
+    - OSM: the largest plant of each cell (earliest on ties).
+    - Hydro: the last pumped/reservoir plant of a cell replaces whatever is
+      there; run-of-river only fills cells that are still empty.
+    - Wind: fills cells that are still empty.
+    
+    Cells are ordered by source, then by first appearance within it.
+    """
+    plants = osm_plants + hydro_plants + wind_plants
+    keys = _plant_keys(plants) if plants else np.empty(0, dtype=np.int64)
+    n_osm, n_hydro = len(osm_plants), len(hydro_plants)
+    osm_rows = np.arange(n_osm)
+    hydro_rows = np.arange(n_osm, n_osm + n_hydro)
+    wind_rows = np.arange(n_osm + n_hydro, len(plants))
+    
+    # Per cell: winning plant and (source stage, first appearance) for ordering
+    cap = np.array([p.capacity_mw for p in osm_plants], dtype=np.float64)
+    by_cap = osm_rows[np.lexsort((-cap, keys[osm_rows]))]
+    cell_keys, winner = _first_per_key(keys, by_cap)
+    _, first = _first_per_key(keys, osm_rows)
+    order = np.column_stack([np.zeros_like(first), first])
+    
+    # Hydro cells: a new cell takes its first hydro plant, then the last
+    # pumped/reservoir plant (if any) overrides it or the OSM plant
+    new_keys, new_first = _first_per_key(keys, hydro_rows[~np.isin(keys[hydro_rows], cell_keys)])
+    cell_keys = np.concatenate([cell_keys, new_keys])
+    winner = np.concatenate([winner, new_first])
+    order = np.concatenate([order, np.column_stack([np.ones_like(new_first), new_first])])
+    
+    storage = hydro_rows[~hydro_is_ror][::-1]
+    storage_keys, last_storage = _first_per_key(keys, storage)
+    sort = np.argsort(cell_keys, kind='stable')
+    cell_pos = sort[np.searchsorted(cell_keys, storage_keys, sorter=sort)]
+    winner[cell_pos] = last_storage
+    
+    # Wind only fills empty cells
+    new_keys, new_first = _first_per_key(keys, wind_rows[~np.isin(keys[wind_rows], cell_keys)])
+    winner = np.concatenate([winner, new_first])
+    order = np.concatenate([order, np.column_stack([np.full_like(new_first, 2), new_first])])
+    
+    return [plants[i] for i in winner[np.lexsort((order[:, 1], order[:, 0]))].tolist()]
 
 
 class PowerPlant:
-    """Represents a power plant with current production estimate."""
+    """Represents a power plant; production is estimated in the model's plant arrays."""
+    __slots__ = ('id', 'name', 'source', 'capacity_mw', 'lon', 'lat', 'operator')
+    
     def __init__(self, feature):
         props = feature['properties']
         coords = feature['geometry']['coordinates']
@@ -78,24 +341,12 @@ class PowerPlant:
         self.lon = coords[0]
         self.lat = coords[1]
         self.operator = props.get('operator', '')
-        
-        # Current production (will be estimated)
-        self.current_production_mw = 0
-        self.utilization_factor = 0
-        
-        # Assigned substation
-        self.assigned_substation = None
-        
-    def estimate_production(self, utilization_factors):
-        """Estimate current production based on source utilization factor."""
-        factor = utilization_factors.get(self.source, 0.3)
-        self.utilization_factor = factor
-        self.current_production_mw = self.capacity_mw * factor
-        return self.current_production_mw
 
 
 class Substation:
-    """Represents a substation with load calculations."""
+    """Represents a substation; loads are calculated in the model's sub_* arrays."""
+    __slots__ = ('lon', 'lat', 'id', 'name', 'voltage', 'operator', 'capacity_mva')
+    
     def __init__(self, data, source='osm'):
         if source == 'osm':
             props = data['properties']
@@ -106,8 +357,7 @@ class Substation:
                 # Centroid for polygons
                 if isinstance(coords[0][0], list):
                     coords = coords[0]
-                self.lon = sum(c[0] for c in coords) / len(coords)
-                self.lat = sum(c[1] for c in coords) / len(coords)
+                self.lon, self.lat = _polygon_centroid(coords)
             
             self.id = props.get('id', f"osm_{data.get('id', '')}")
             self.name = props.get('name', '')
@@ -123,74 +373,51 @@ class Substation:
             self.operator = data.get('operator', '')
         
         # Estimate capacity based on voltage
-        if self.voltage >= 380:
-            self.capacity_mva = 2000
-        elif self.voltage >= 220:
-            self.capacity_mva = 750
-        else:
-            self.capacity_mva = 300
-        
-        # Power flow components
-        self.generation_mw = 0
-        self.load_mw = 0
-        self.crossborder_mw = 0
-        self.net_flow_mw = 0
-        self.load_percent = 0
-        self.status = 'unknown'
-        
-        # Connected plants
-        self.connected_plants = []
-        self.plants_by_source = {}
+        self.capacity_mva = int(TIER_CAPACITY_MVA[bisect_right(VOLTAGE_TIERS_KV, self.voltage)])
         
     def _parse_voltage(self, v):
         """Parse voltage string to integer kV."""
-        try:
-            v_str = str(v).replace('kV', '').split(';')[0].strip()
-            v_int = int(float(v_str))
-            if v_int > 1000:
-                v_int = v_int // 1000
-            return v_int
-        except:
-            return 380
-    
-    def add_plant(self, plant):
-        """Add a power plant to this substation."""
-        self.connected_plants.append(plant)
-        plant.assigned_substation = self
-        
-        # Track by source
-        src = plant.source
-        if src not in self.plants_by_source:
-            self.plants_by_source[src] = []
-        self.plants_by_source[src].append(plant)
-    
-    def calculate_generation(self):
-        """Sum up generation from all connected plants."""
-        self.generation_mw = sum(p.current_production_mw for p in self.connected_plants)
-        return self.generation_mw
-    
-    def get_generation_breakdown(self):
-        """Get generation breakdown by source."""
-        breakdown = {}
-        for src, plants in self.plants_by_source.items():
-            total = sum(p.current_production_mw for p in plants)
-            if total > 0:
-                breakdown[src] = {
-                    'production_mw': total,
-                    'capacity_mw': sum(p.capacity_mw for p in plants),
-                    'plant_count': len(plants),
-                }
-        return breakdown
+        return parse_voltage_tag(str(v))
 
 
 class SubstationLoadModel:
     def __init__(self):
         self.power_plants = []
         self.substations = []
+        
+        # Per-plant arrays (SoA), parallel to self.power_plants. Coordinates
+        # and MW stay float64 (they are reported as-is); ids use compact ints
+        self.plant_lat = np.empty(0)
+        self.plant_lon = np.empty(0)
+        self.plant_cap_mw = np.empty(0)
+        self.plant_source_id = np.empty(0, dtype=np.int8)
+        self.plant_prod_mw = np.empty(0)
+        self.plant_util = np.empty(0)
+        self.plant_sub_idx = np.empty(0, dtype=np.int32)
+        
+        # Per-substation arrays, parallel to self.substations
+        self.sub_lat = np.empty(0)
+        self.sub_lon = np.empty(0)
+        self.sub_volt = np.empty(0, dtype=np.int32)
+        self.sub_cap_mva = np.empty(0, dtype=np.int16)
+        self.sub_gen_mw = np.empty(0)
+        self.sub_load_mw = np.empty(0)
+        self.sub_cross_mw = np.empty(0)
+        self.sub_net_flow_mw = np.empty(0)
+        self.sub_load_percent = np.empty(0)
+        self.sub_status = np.empty(0, dtype=np.uint8)  # codes into STATUS_LABELS
+        self.sub_region_id = np.empty(0, dtype=np.int8)  # index into REGIONS
+        self.sub_load_weight = np.empty(0)  # static share of national load, see distribute_load
+        # (countries x substations) HV border-box membership; rows follow border_regions
+        self.border_membership = np.empty((0, 0), dtype=bool)
+        
         self.generation_data = {}
         self.load_data = {}
         self.crossborder_data = {}
         self.utilization_factors = {}
+        self.util_by_src_id = np.full(len(SOURCES), 0.3)  # utilization_factors indexed by source id
+        self.count_by_src_id = np.zeros(len(SOURCES), dtype=np.intp)  # plants per source id
+        self.capacity_by_src_id = np.zeros(len(SOURCES))  # installed MW per source id
         
         # Regional load factors
         self.regional_load_factors = {
@@ -217,8 +444,30 @@ class SubstationLoadModel:
         }
         
     def load_power_plants(self):
-        """Load all power plants from multiple data sources and merge."""
-        plants_by_location = {}  # Key: (rounded lat, lon) to avoid duplicates
+        """Load all power plants, reusing the parsed cache if sources are unchanged."""
+        self.power_plants = load_cached('power_plants_cache.pkl', PLANT_SOURCE_FILES,
+                                        self._parse_power_plants)
+        self._build_plant_arrays()
+        
+        # Count by source
+        count_by_source = np.bincount(self.plant_source_id, minlength=len(SOURCES))
+        cap_by_source = np.bincount(self.plant_source_id, weights=self.plant_cap_mw,
+                                    minlength=len(SOURCES))
+        self.count_by_src_id = count_by_source
+        self.capacity_by_src_id = cap_by_source
+        self.capacity_by_source = {
+            src: {'count': int(count_by_source[i]), 'capacity': float(cap_by_source[i])}
+            for i, src in enumerate(SOURCES)
+            if count_by_source[i] > 0
+        }
+        
+        print(f"Loaded {len(self.power_plants)} power plants:")
+        for src, stats in sorted(self.capacity_by_source.items()):
+            print(f"  {src}: {stats['count']} plants, {stats['capacity']:.0f} MW")
+    
+    def _parse_power_plants(self):
+        """Parse power plants from multiple data sources and merge."""
+        osm_plants, hydro_plants, hydro_is_ror, wind_plants = [], [], [], []
         
         # 1. Load from all_power_plants.json (OSM data)
         try:
@@ -226,9 +475,7 @@ class SubstationLoadModel:
             for feature in data.get('features', []):
                 plant = PowerPlant(feature)
                 if plant.capacity_mw and plant.capacity_mw > 0:
-                    key = (round(plant.lat, 3), round(plant.lon, 3))
-                    if key not in plants_by_location or plant.capacity_mw > plants_by_location[key].capacity_mw:
-                        plants_by_location[key] = plant
+                    osm_plants.append(plant)
         except Exception as e:
             print(f"Could not load all_power_plants.json: {e}")
         
@@ -247,16 +494,21 @@ class SubstationLoadModel:
                 else:
                     source = 'hydro_run_of_river'
                 
-                feature['properties']['capacity_mw'] = props.get('mw', 0)
-                feature['properties']['source'] = source
-                feature['properties']['name'] = props.get('name', f"{props.get('river', '')} {plant_type}")
+                # Copy rather than edit the properties; load_json shares its parse
+                feature = {
+                    'properties': {
+                        **props,
+                        'capacity_mw': props.get('mw', 0),
+                        'source': source,
+                        'name': props.get('name', f"{props.get('river', '')} {plant_type}"),
+                    },
+                    'geometry': feature['geometry'],
+                }
                 
                 plant = PowerPlant(feature)
                 if plant.capacity_mw > 0:
-                    key = (round(plant.lat, 3), round(plant.lon, 3))
-                    # Prefer this data if it has better categorization
-                    if key not in plants_by_location or source != 'hydro_run_of_river':
-                        plants_by_location[key] = plant
+                    hydro_plants.append(plant)
+                    hydro_is_ror.append(source == 'hydro_run_of_river')
         except Exception as e:
             print(f"Could not load hydropower_plants.json: {e}")
         
@@ -276,61 +528,105 @@ class SubstationLoadModel:
                             'coordinates': [t['lon'], t['lat']]
                         }
                     }
-                    plant = PowerPlant(feature)
-                    key = (round(plant.lat, 3), round(plant.lon, 3))
-                    if key not in plants_by_location:
-                        plants_by_location[key] = plant
+                    wind_plants.append(PowerPlant(feature))
         except Exception as e:
             print(f"Could not load wind_turbines_enhanced.json: {e}")
         
-        self.power_plants = list(plants_by_location.values())
-        
-        # Count by source
-        self.capacity_by_source = {}
-        for p in self.power_plants:
-            if p.source not in self.capacity_by_source:
-                self.capacity_by_source[p.source] = {'count': 0, 'capacity': 0}
-            self.capacity_by_source[p.source]['count'] += 1
-            self.capacity_by_source[p.source]['capacity'] += p.capacity_mw
-        
-        print(f"Loaded {len(self.power_plants)} power plants:")
-        for src, stats in sorted(self.capacity_by_source.items()):
-            print(f"  {src}: {stats['count']} plants, {stats['capacity']:.0f} MW")
+        return merge_plants(osm_plants, hydro_plants, np.array(hydro_is_ror, dtype=bool), wind_plants)
     
     def load_substations(self):
         """Load substations from OSM data."""
+        self.substations = load_cached('substations_cache.pkl', SUBSTATION_SOURCE_FILES,
+                                       self._parse_substations)
+        self._build_substation_arrays()
+        print(f"Loaded {len(self.substations)} substations")
+    
+    def _parse_substations(self):
+        """Parse OSM substations plus transformer stations not already covered."""
+        substations = []
         try:
             osm_subs = load_json('osm_substations.json')
             for feature in osm_subs.get('features', []):
                 sub = Substation(feature, source='osm')
                 if sub.voltage >= 110:
-                    self.substations.append(sub)
+                    substations.append(sub)
         except:
             pass
         
         # Also load transformer stations
         try:
-            transformers = load_json('transformer_stations.json')
-            existing_coords = set((round(s.lat, 3), round(s.lon, 3)) for s in self.substations)
+            transformers = [t for t in load_json('transformer_stations.json')
+                            if t.get('latitude') and t.get('longitude')]
+            osm_keys = grid_key(np.array([s.lat for s in substations], dtype=np.float64),
+                                np.array([s.lon for s in substations], dtype=np.float64))
+            t_keys = grid_key(np.array([t['latitude'] for t in transformers], dtype=np.float64),
+                              np.array([t['longitude'] for t in transformers], dtype=np.float64))
             
-            for t in transformers:
-                if t.get('latitude') and t.get('longitude'):
-                    coord_key = (round(t['latitude'], 3), round(t['longitude'], 3))
-                    if coord_key not in existing_coords:
-                        sub = Substation(t, source='transformer')
-                        self.substations.append(sub)
-                        existing_coords.add(coord_key)
+            # Skip transformers on an OSM substation's cell, then keep the
+            # first transformer of each remaining cell
+            new_rows = np.flatnonzero(~np.isin(t_keys, osm_keys))
+            _, first = np.unique(t_keys[new_rows], return_index=True)
+            for i in np.sort(new_rows[first]).tolist():
+                substations.append(Substation(transformers[i], source='transformer'))
         except:
             pass
         
-        print(f"Loaded {len(self.substations)} substations")
+        return substations
+    
+    def _build_plant_arrays(self):
+        """Mirror the numeric plant fields into parallel NumPy arrays."""
+        plants = self.power_plants
+        other = SOURCE_TO_ID['other']
+        self.plant_lat = np.array([p.lat for p in plants], dtype=np.float64)
+        self.plant_lon = np.array([p.lon for p in plants], dtype=np.float64)
+        self.plant_cap_mw = np.array([p.capacity_mw for p in plants], dtype=np.float64)
+        self.plant_source_id = np.array([SOURCE_TO_ID.get(p.source, other) for p in plants], dtype=np.int8)
+        self.plant_prod_mw = np.zeros(len(plants))
+        self.plant_util = np.zeros(len(plants))
+        self.plant_sub_idx = np.full(len(plants), -1, dtype=np.int32)
+    
+    def _build_substation_arrays(self):
+        """Mirror the numeric substation fields into parallel NumPy arrays."""
+        self.sub_lat = np.array([s.lat for s in self.substations], dtype=np.float64)
+        self.sub_lon = np.array([s.lon for s in self.substations], dtype=np.float64)
+        self.sub_volt = np.array([s.voltage for s in self.substations], dtype=np.int32)
+        self.sub_cap_mva = TIER_CAPACITY_MVA[np.searchsorted(VOLTAGE_TIERS_KV, self.sub_volt, side='right')]
+        self.sub_gen_mw = np.zeros(len(self.substations))
+        self.sub_load_mw = np.zeros(len(self.substations))
+        self.sub_cross_mw = np.zeros(len(self.substations))
+        self.sub_net_flow_mw = np.zeros(len(self.substations))
+        self.sub_load_percent = np.zeros(len(self.substations))
+        self.sub_status = np.full(len(self.substations), STATUS_UNKNOWN, dtype=np.uint8)
+        
+        # Weight each substation by regional factor and voltage level
+        factor_by_region = np.array([self.regional_load_factors.get(r, 0.5) for r in REGIONS])
+        self.sub_region_id = self._get_region_ids(self.sub_lat, self.sub_lon).astype(np.int8)
+        self.sub_load_weight = factor_by_region[self.sub_region_id] * (self.sub_volt / 110)
+        
+        # HV substations inside each country's border box, all boxes at once;
+        # only the HV slice is tested, then scattered back to global indices
+        self.sub_hv_idx = np.flatnonzero(self.sub_volt >= 220)
+        hv_lat = self.sub_lat[self.sub_hv_idx]
+        hv_lon = self.sub_lon[self.sub_hv_idx]
+        boxes = np.array([region['lat_range'] + region['lon_range']
+                          for region in self.border_regions.values()], dtype=np.float64).reshape(-1, 4)
+        lat_lo, lat_hi, lon_lo, lon_hi = (col[:, None] for col in boxes.T)
+        self.border_membership = np.zeros((len(boxes), len(self.substations)), dtype=bool)
+        self.border_membership[:, self.sub_hv_idx] = ((hv_lat >= lat_lo) & (hv_lat <= lat_hi) &
+                                                      (hv_lon >= lon_lo) & (hv_lon <= lon_hi))
     
     def load_live_data(self):
         """Load current generation data from ENTSO-E API."""
+        # Fetch both endpoints concurrently; errors surface from .result() below
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            generation_future = executor.submit(
+                fetch_entsoe, 'http://localhost:8000/api/entsoe/generation')
+            crossborder_future = executor.submit(
+                fetch_entsoe, 'http://localhost:8000/api/entsoe/cross-border-flows')
+        
         try:
-            response = requests.get('http://localhost:8000/api/entsoe/generation', timeout=15)
-            if response.status_code == 200:
-                data = response.json()
+            data = generation_future.result()
+            if data is not None:
                 self.generation_data = data.get('generation', {})
                 print(f"Live generation: {sum(self.generation_data.values()):.0f} MW")
         except Exception as e:
@@ -339,9 +635,8 @@ class SubstationLoadModel:
         
         # Get cross-border flows
         try:
-            response = requests.get('http://localhost:8000/api/entsoe/cross-border-flows', timeout=15)
-            if response.status_code == 200:
-                data = response.json()
+            data = crossborder_future.result()
+            if data is not None:
                 for country, flow in data.get('flows', {}).items():
                     self.crossborder_data[country] = {
                         'import': flow.get('import_mw', 0),
@@ -362,47 +657,40 @@ class SubstationLoadModel:
         """Calculate utilization factors to match ENTSO-E totals exactly."""
         
         # Map ENTSO-E generation to our source categories
-        entsoe_by_source = {}
-        for entsoe_type, value in self.generation_data.items():
-            src = ENTSOE_TO_SOURCE.get(entsoe_type, 'other')
-            if src not in entsoe_by_source:
-                entsoe_by_source[src] = 0
-            entsoe_by_source[src] += value
+        generation = np.array([self.generation_data.get(t, 0.0) for t in ENTSOE_TYPES], dtype=np.float64)
+        generation_by_source = np.bincount(ENTSOE_SOURCE_IDS, weights=generation, minlength=len(SOURCES))
+        # Types without a mapping count as 'other'
+        generation_by_source[SOURCE_TO_ID['other']] += sum(
+            value for entsoe_type, value in self.generation_data.items()
+            if entsoe_type not in ENTSOE_TO_SOURCE)
+        entsoe_by_source = {
+            src: float(generation_by_source[i])
+            for i, src in enumerate(SOURCES)
+            if generation_by_source[i] != 0
+        }
         
         print("\nENTSO-E generation by source:")
         for src, gen in sorted(entsoe_by_source.items()):
             print(f"  {src}: {gen:.0f} MW")
         
-        # Calculate utilization factors to match ENTSO-E exactly
+        # Calculate utilization factors to match ENTSO-E exactly; sources
+        # without ENTSO-E data use DEFAULT_UTILIZATION, empty ones 0
+        capacity = self.capacity_by_src_id
+        calibrated = (capacity > 0) & (generation_by_source > 0)
+        # Cap at 1.0 (100% utilization) but allow slight overage for rounding
+        factor = np.minimum(np.divide(generation_by_source, capacity, out=np.zeros(len(SOURCES)),
+                                      where=calibrated), 1.05)
+        factor = np.where(calibrated, factor, np.where(capacity > 0, DEFAULT_UTIL_BY_SRC_ID, 0.0))
+        
         print("\nCalibrated utilization factors:")
-        for src, stats in self.capacity_by_source.items():
-            capacity = stats['capacity']
-            entsoe_gen = entsoe_by_source.get(src, 0)
-            
-            if capacity > 0 and entsoe_gen > 0:
-                # Calculate factor that makes our production match ENTSO-E
-                factor = entsoe_gen / capacity
-                # Cap at 1.0 (100% utilization) but allow slight overage for rounding
-                factor = min(factor, 1.05)
-                self.utilization_factors[src] = factor
-                print(f"  {src}: {entsoe_gen:.0f} MW / {capacity:.0f} MW = {factor:.1%}")
-            elif capacity > 0:
-                # No ENTSO-E data for this source, use defaults
-                defaults = {
-                    'hydro_run_of_river': 0.05,
-                    'hydro_reservoir': 0.10,
-                    'hydro_pumped': 0.02,
-                    'wind': 0.04,
-                    'solar': 0.0,
-                    'gas': 0.28,
-                    'coal': 0.0,
-                    'biomass': 0.80,
-                    'waste': 0.36,
-                    'other': 0.30,
-                }
-                self.utilization_factors[src] = defaults.get(src, 0.1)
-            else:
-                self.utilization_factors[src] = 0
+        for i in np.flatnonzero(calibrated).tolist():
+            print(f"  {SOURCES[i]}: {generation_by_source[i]:.0f} MW / {capacity[i]:.0f} MW = {factor[i]:.1%}")
+        
+        present = self.count_by_src_id > 0
+        self.utilization_factors = {SOURCES[i]: float(factor[i]) for i in np.flatnonzero(present).tolist()}
+        
+        # Lookup array for the per-plant gather in estimate_plant_production
+        self.util_by_src_id = np.where(present, factor, 0.3)
         
         # Store ENTSO-E totals for validation
         self.entsoe_by_source = entsoe_by_source
@@ -410,31 +698,30 @@ class SubstationLoadModel:
     def estimate_plant_production(self):
         """Estimate current production for each plant, calibrated to ENTSO-E."""
         # First pass: calculate raw production
-        production_by_source = {}
-        for plant in self.power_plants:
-            plant.estimate_production(self.utilization_factors)
-            src = plant.source
-            if src not in production_by_source:
-                production_by_source[src] = 0
-            production_by_source[src] += plant.current_production_mw
+        self.plant_util = self.util_by_src_id[self.plant_source_id]
+        self.plant_prod_mw = self.plant_cap_mw * self.plant_util
+        production_by_source = np.bincount(self.plant_source_id, weights=self.plant_prod_mw,
+                                           minlength=len(SOURCES))
         
         # Second pass: adjust to match ENTSO-E exactly
         print("\nProduction calibration:")
-        for src, model_prod in production_by_source.items():
-            entsoe_prod = self.entsoe_by_source.get(src, 0)
-            if model_prod > 0 and entsoe_prod > 0:
-                # Calculate adjustment factor
-                adjustment = entsoe_prod / model_prod
-                if abs(adjustment - 1.0) > 0.01:  # Only adjust if > 1% difference
-                    print(f"  {src}: adjusting {model_prod:.0f} -> {entsoe_prod:.0f} MW (factor: {adjustment:.3f})")
-                    # Apply adjustment to all plants of this source
-                    for plant in self.power_plants:
-                        if plant.source == src:
-                            plant.current_production_mw *= adjustment
-                            plant.utilization_factor *= adjustment
+        entsoe_prod = np.array([self.entsoe_by_source.get(src, 0) for src in SOURCES], dtype=np.float64)
+        adjustment_by_source = np.divide(entsoe_prod, production_by_source,
+                                         out=np.ones(len(SOURCES)), where=production_by_source > 0)
+        # Only adjust sources with ENTSO-E data that are off by more than 1%
+        adjust = (production_by_source > 0) & (entsoe_prod > 0) & (np.abs(adjustment_by_source - 1.0) > 0.01)
+        adjustment_by_source[~adjust] = 1.0
+        for src_id in np.flatnonzero(adjust).tolist():
+            print(f"  {SOURCES[src_id]}: adjusting {production_by_source[src_id]:.0f} -> "
+                  f"{entsoe_prod[src_id]:.0f} MW (factor: {adjustment_by_source[src_id]:.3f})")
+        
+        # Apply adjustment to all plants of each source
+        plant_adjustment = adjustment_by_source[self.plant_source_id]
+        self.plant_prod_mw *= plant_adjustment
+        self.plant_util *= plant_adjustment
         
         # Calculate final total
-        total_production = sum(p.current_production_mw for p in self.power_plants)
+        total_production = float(self.plant_prod_mw.sum())
         entsoe_total = sum(self.generation_data.values())
         
         print(f"\nFinal production: {total_production:.0f} MW (ENTSO-E: {entsoe_total:.0f} MW)")
@@ -448,180 +735,192 @@ class SubstationLoadModel:
     
     def assign_plants_to_substations(self):
         """Assign each power plant to the nearest suitable substation."""
-        # Build spatial index of substations by voltage
-        hv_substations = [s for s in self.substations if s.voltage >= 220]
-        mv_substations = [s for s in self.substations if s.voltage >= 110]
-        
-        for plant in self.power_plants:
-            # Large plants (> 50 MW) connect to HV, others to nearest
-            if plant.capacity_mw > 50:
-                candidates = hv_substations
-                max_dist = 50
-            else:
-                candidates = mv_substations
-                max_dist = 30
-            
-            min_dist = float('inf')
-            nearest = None
-            
-            for sub in candidates:
-                dist = haversine_distance(plant.lat, plant.lon, sub.lat, sub.lon)
-                if dist < min_dist:
-                    min_dist = dist
-                    nearest = sub
-            
-            if nearest and min_dist < max_dist:
-                nearest.add_plant(plant)
+        assigned, _ = assign_nearest(self.plant_lat, self.plant_lon, self.plant_cap_mw,
+                                     self.sub_lat, self.sub_lon, self.sub_volt)
+        self.plant_sub_idx = assigned.astype(np.int32)
         
         # Count assignments
-        assigned = sum(1 for p in self.power_plants if p.assigned_substation)
+        assigned = int(np.count_nonzero(self.plant_sub_idx >= 0))
         print(f"Assigned {assigned}/{len(self.power_plants)} plants to substations")
     
     def calculate_generation_per_substation(self):
         """Calculate total generation at each substation."""
-        for sub in self.substations:
-            sub.calculate_generation()
+        assigned = self.plant_sub_idx >= 0
+        self.sub_gen_mw = np.bincount(self.plant_sub_idx[assigned], weights=self.plant_prod_mw[assigned],
+                                      minlength=len(self.substations))
     
     def distribute_load(self):
         """Distribute national load to substations."""
         total_load = self.load_data.get('total', 7000)
         
-        # Calculate total weight
-        total_weight = 0
-        for sub in self.substations:
-            region = self._get_region(sub.lat, sub.lon)
-            factor = self.regional_load_factors.get(region, 0.5)
-            voltage_factor = sub.voltage / 110
-            sub._load_weight = factor * voltage_factor
-            total_weight += sub._load_weight
-        
-        # Distribute load
-        for sub in self.substations:
-            sub.load_mw = total_load * (sub._load_weight / total_weight)
-    
-    def _get_region(self, lat, lon):
-        """Determine region from coordinates."""
-        if lon > 16 and lat > 48:
-            return 'Wien'
-        elif lon > 15.5 and lat > 48:
-            return 'Niederösterreich'
-        elif lon > 13 and lon < 15 and lat > 47.5:
-            return 'Oberösterreich'
-        elif lon > 14 and lat < 47.5:
-            return 'Steiermark'
-        elif lon < 11:
-            return 'Vorarlberg'
-        elif lon < 12.5 and lat < 47.5:
-            return 'Tirol'
-        elif lon > 12.5 and lon < 14 and lat > 47:
-            return 'Salzburg'
-        elif lon > 13 and lon < 15 and lat < 47:
-            return 'Kärnten'
-        elif lon > 16:
-            return 'Burgenland'
-        return 'Niederösterreich'
+        # Distribute load by the weights fixed in _build_substation_arrays
+        weights = self.sub_load_weight
+        self.sub_load_mw = total_load * (weights / weights.sum())
+    
+    def _get_region_ids(self, lat, lon):
+        """Determine the region of each coordinate, as REGIONS indices."""
+        # One bounding rule per entry of REGIONS, in order of precedence
+        # (np.select takes the first match); unmatched points are Niederösterreich
+        conditions = [
+            (lon > 16) & (lat > 48),
+            (lon > 15.5) & (lat > 48),
+            (lon > 13) & (lon < 15) & (lat > 47.5),
+            (lon > 14) & (lat < 47.5),
+            lon < 11,
+            (lon < 12.5) & (lat < 47.5),
+            (lon > 12.5) & (lon < 14) & (lat > 47),
+            (lon > 13) & (lon < 15) & (lat < 47),
+            lon > 16,
+        ]
+        return np.select(conditions, range(len(REGIONS)), default=REGION_TO_ID['Niederösterreich'])
     
     def assign_crossborder_flows(self):
         """Assign cross-border flows to border substations."""
-        for country, flow in self.crossborder_data.items():
-            if country not in self.border_regions:
-                continue
-            
-            region = self.border_regions[country]
-            net_flow = flow.get('net', 0)
-            
-            # Find substations in border region
-            border_subs = []
-            for sub in self.substations:
-                if (region['lat_range'][0] <= sub.lat <= region['lat_range'][1] and
-                    region['lon_range'][0] <= sub.lon <= region['lon_range'][1] and
-                    sub.voltage >= 220):
-                    border_subs.append(sub)
-            
-            # Distribute flow among border substations
-            if border_subs:
-                flow_per_sub = net_flow / len(border_subs)
-                for sub in border_subs:
-                    sub.crossborder_mw += flow_per_sub
+        net_flow = np.array([self.crossborder_data.get(country, {}).get('net', 0)
+                             for country in self.border_regions], dtype=np.float64)
+        
+        # Distribute each country's flow evenly among its border substations
+        n_border = self.border_membership.sum(axis=1)
+        share = np.divide(net_flow, n_border, out=np.zeros_like(net_flow), where=n_border > 0)
+        self.sub_cross_mw += share @ self.border_membership
     
     def calculate_substation_loads(self):
         """Calculate final load percentage for each substation."""
-        for sub in self.substations:
-            # Net flow = generation - load + imports
-            sub.net_flow_mw = sub.generation_mw - sub.load_mw + sub.crossborder_mw
-            
-            # Load is the magnitude of power flowing through
-            flow_magnitude = abs(sub.net_flow_mw)
-            capacity_mw = sub.capacity_mva * 0.9  # Power factor
-            
-            if capacity_mw > 0:
-                sub.load_percent = min((flow_magnitude / capacity_mw) * 100, 150)
-            else:
-                sub.load_percent = 0
-            
-            # Status based on load percentage
-            if sub.load_percent > 80:
-                sub.status = 'high'
-            elif sub.load_percent > 50:
-                sub.status = 'medium'
-            else:
-                sub.status = 'low'
+        # Net flow = generation - load + imports
+        net_flow = self.sub_gen_mw - self.sub_load_mw + self.sub_cross_mw
+        
+        # Load is the magnitude of power flowing through
+        flow_magnitude = np.abs(net_flow)
+        capacity_mw = self.sub_cap_mva * 0.9  # Power factor
+        
+        load_ratio = np.divide(flow_magnitude, capacity_mw, out=np.zeros_like(flow_magnitude),
+                               where=capacity_mw > 0)
+        load_percent = np.minimum(load_ratio * 100, 150)
+        
+        self.sub_net_flow_mw = net_flow
+        self.sub_load_percent = load_percent
+        # Status based on load percentage: > 80 high, > 50 medium, else low
+        self.sub_status = np.digitize(load_percent, STATUS_THRESHOLDS, right=True).astype(np.uint8)
+    
+    def _generation_breakdowns(self):
+        """Per-substation, per-source production, capacity and plant count.
+        
+        Returns three (n_substations, n_sources) arrays built from one bincount
+        each over the combined substation/source key.
+        """
+        n_src = len(SOURCES)
+        size = len(self.substations) * n_src
+        assigned = self.plant_sub_idx >= 0
+        key = self.plant_sub_idx[assigned].astype(np.intp) * n_src + self.plant_source_id[assigned]
+        shape = (len(self.substations), n_src)
+        prod = np.bincount(key, weights=self.plant_prod_mw[assigned], minlength=size).reshape(shape)
+        cap = np.bincount(key, weights=self.plant_cap_mw[assigned], minlength=size).reshape(shape)
+        count = np.bincount(key, minlength=size).reshape(shape)
+        return prod, cap, count
     
     def get_results(self):
         """Get results as list of dictionaries."""
+        rows = np.flatnonzero(self.sub_volt >= 110)
+        prod, cap, count = self._generation_breakdowns()
+        columns = {
+            'id': [self.substations[i].id for i in rows],
+            'name': [self.substations[i].name for i in rows],
+            'lat': self.sub_lat[rows].tolist(),
+            'lon': self.sub_lon[rows].tolist(),
+            'voltage': self.sub_volt[rows].tolist(),
+            'capacity_mva': self.sub_cap_mva[rows].tolist(),
+            'generation_mw': self.sub_gen_mw[rows].tolist(),
+            'load_mw': self.sub_load_mw[rows].tolist(),
+            'crossborder_mw': self.sub_cross_mw[rows].tolist(),
+            'net_flow_mw': self.sub_net_flow_mw[rows].tolist(),
+            'load_percent': self.sub_load_percent[rows].tolist(),
+            'status': STATUS_LABELS[self.sub_status[rows]].tolist(),
+        }
+        
+        # Plants grouped by substation, largest production first within each
+        # group (lexsort is stable, so ties keep plant order)
+        by_sub = np.lexsort((-self.plant_prod_mw, self.plant_sub_idx))
+        sorted_sub = self.plant_sub_idx[by_sub]
+        starts = np.searchsorted(sorted_sub, rows, side='left').tolist()
+        ends = np.searchsorted(sorted_sub, rows, side='right').tolist()
+        
         results = []
-        for sub in self.substations:
-            if sub.voltage >= 110:
-                # Get top connected plants
-                top_plants = sorted(sub.connected_plants, 
-                                   key=lambda p: p.current_production_mw, 
-                                   reverse=True)[:5]
-                
-                results.append({
-                    'id': sub.id,
-                    'name': sub.name,
-                    'lat': sub.lat,
-                    'lon': sub.lon,
-                    'voltage': sub.voltage,
-                    'capacity_mva': sub.capacity_mva,
-                    'generation_mw': sub.generation_mw,
-                    'load_mw': sub.load_mw,
-                    'crossborder_mw': sub.crossborder_mw,
-                    'net_flow_mw': sub.net_flow_mw,
-                    'load_percent': sub.load_percent,
-                    'status': sub.status,
-                    'plant_count': len(sub.connected_plants),
-                    'connected_plants': [
-                        {
-                            'name': p.name,
-                            'source': p.source,
-                            'capacity_mw': p.capacity_mw,
-                            'production_mw': p.current_production_mw,
-                            'utilization': p.utilization_factor,
-                        }
-                        for p in top_plants
-                    ],
-                    'generation_breakdown': sub.get_generation_breakdown(),
-                })
+        for i, start, end, values in zip(rows.tolist(), starts, ends, zip(*columns.values())):
+            # Get top connected plants
+            top_plants = by_sub[start:min(end, start + 5)].tolist()
+            
+            result = dict(zip(columns, values))
+            result['plant_count'] = end - start
+            result['connected_plants'] = [
+                {
+                    'name': self.power_plants[j].name,
+                    'source': self.power_plants[j].source,
+                    'capacity_mw': self.power_plants[j].capacity_mw,
+                    'production_mw': self.plant_prod_mw[j].item(),
+                    'utilization': self.plant_util[j].item(),
+                }
+                for j in top_plants
+            ]
+            result['generation_breakdown'] = {
+                SOURCES[k]: {
+                    'production_mw': prod[i, k].item(),
+                    'capacity_mw': cap[i, k].item(),
+                    'plant_count': count[i, k].item(),
+                }
+                for k in np.flatnonzero(prod[i] > 0).tolist()
+            }
+            results.append(result)
         
         return results
     
+    def get_summary(self):
+        """Status counts and totals over the substations reported by get_results."""
+        rows = self.sub_volt >= 110
+        counts = np.bincount(self.sub_status[rows], minlength=len(STATUS_LABELS))
+        high_load = int(counts[2])
+        medium_load = int(counts[1])
+        total = int(counts.sum())
+        return {
+            'total_substations': total,
+            'high_load': high_load,
+            'medium_load': medium_load,
+            'low_load': total - high_load - medium_load,
+            'total_plants': len(self.power_plants),
+            'total_generation_mw': float(self.sub_gen_mw[rows].sum()),
+            'total_load_mw': float(self.sub_load_mw[rows].sum()),
+        }
+    
     def get_all_plants(self):
         """Get all power plants with current production."""
-        return [
-            {
-                'id': p.id,
-                'name': p.name,
-                'source': p.source,
-                'lat': p.lat,
-                'lon': p.lon,
-                'capacity_mw': p.capacity_mw,
-                'production_mw': p.current_production_mw,
-                'utilization': p.utilization_factor,
-                'substation': p.assigned_substation.name if p.assigned_substation else None,
-            }
-            for p in self.power_plants
-        ]
+        sub_names = [s.name for s in self.substations]
+        columns = {
+            'id': [p.id for p in self.power_plants],
+            'name': [p.name for p in self.power_plants],
+            'source': [p.source for p in self.power_plants],
+            'lat': self.plant_lat.tolist(),
+            'lon': self.plant_lon.tolist(),
+            'capacity_mw': self.plant_cap_mw.tolist(),
+            'production_mw': self.plant_prod_mw.tolist(),
+            'utilization': self.plant_util.tolist(),
+            'substation': [sub_names[j] if j >= 0 else None for j in self.plant_sub_idx.tolist()],
+        }
+        return [dict(zip(columns, values)) for values in zip(*columns.values())]
+    
+    def get_plant_summary(self):
+        """Plant count, capacity and production in total and per source."""
+        sources, inverse = np.unique([p.source for p in self.power_plants], return_inverse=True)
+        count = np.bincount(inverse, minlength=len(sources))
+        cap = np.bincount(inverse, weights=self.plant_cap_mw, minlength=len(sources))
+        prod = np.bincount(inverse, weights=self.plant_prod_mw, minlength=len(sources))
+        return {
+            'total_plants': len(self.power_plants),
+            'total_capacity_mw': float(self.plant_cap_mw.sum()),
+            'total_production_mw': float(self.plant_prod_mw.sum()),
+            'by_source': {
+                src: {'count': int(n), 'capacity_mw': float(c), 'production_mw': float(pr)}
+                for src, n, c, pr in zip(sources.tolist(), count, cap, prod)
+            },
+        }
     
     def run(self):
         """Run the complete model."""
@@ -629,24 +928,42 @@ class SubstationLoadModel:
         print("SUBSTATION LOAD MODEL")
         print("="*60)
         
+        self.load_static_data()
+        return self.update()
+    
+    def load_static_data(self):
+        """Load plants and substations and connect them; independent of live data."""
         print("\n1. Loading power plants...")
         self.load_power_plants()
         
         print("\n2. Loading substations...")
         self.load_substations()
         
-        print("\n3. Loading live ENTSO-E data...")
+        print("\n3. Assigning plants to substations...")
+        self.assign_plants_to_substations()
+    
+    def _reset_live_state(self):
+        """Clear everything derived from a previous ENTSO-E snapshot."""
+        self.generation_data = {}
+        self.load_data = {}
+        self.crossborder_data = {}
+        self.utilization_factors = {}
+        self.util_by_src_id = np.full(len(SOURCES), 0.3)
+        self.sub_cross_mw = np.zeros(len(self.substations))
+    
+    def update(self):
+        """Recompute the live-data dependent steps on top of load_static_data()."""
+        self._reset_live_state()
+        
+        print("\n4. Loading live ENTSO-E data...")
         self.load_live_data()
         
-        print("\n4. Calculating utilization factors...")
+        print("\n5. Calculating utilization factors...")
         self.calculate_utilization_factors()
         
-        print("\n5. Estimating plant production...")
+        print("\n6. Estimating plant production...")
         self.estimate_plant_production()
         
-        print("\n6. Assigning plants to substations...")
-        self.assign_plants_to_substations()
-        
         print("\n7. Calculating generation per substation...")
         self.calculate_generation_per_substation()
         
@@ -662,33 +979,60 @@ class SubstationLoadModel:
         return self.get_results()
 
 
-def get_substation_loads_json():
-    """Get substation loads as JSON (for API endpoint)."""
+def get_model():
+    """
+    Process-wide model with static data loaded. Plants, substations and
+    their assignment are rebuilt only when one of their source files
+    changes; call update() for live data.
+    """
+    try:
+        sources_key = tuple(os.path.getmtime(f'{DATA_DIR}/{f}')
+                            for f in PLANT_SOURCE_FILES + SUBSTATION_SOURCE_FILES)
+    except OSError:
+        sources_key = None
+    return _static_model(sources_key)
+
+
+@lru_cache(maxsize=1)
+def _static_model(sources_key):
+    """Build the shared model for one set of source mtimes (see get_model)."""
     model = SubstationLoadModel()
-    loads = model.run()
+    model.load_static_data()
+    return model
+
+
+# Serializes update() on the shared model
+_MODEL_LOCK = threading.Lock()
+
+
+def get_substation_loads_json():
+    """
+    Get substation loads as JSON (for API endpoint).
     
-    # Get summary stats
-    high_load = sum(1 for s in loads if s['status'] == 'high')
-    medium_load = sum(1 for s in loads if s['status'] == 'medium')
+    Updates the shared static model with live data; the API route caches
+    the serialized response.
+    """
+    model = get_model()
+    with _MODEL_LOCK:
+        loads = model.update()
+        power_plants = model.get_all_plants()
+        utilization_factors = model.utilization_factors
+        summary = model.get_summary()
     
     return {
         'timestamp': datetime.now(timezone.utc).isoformat(),
         'substations': loads,
-        'power_plants': model.get_all_plants(),
-        'utilization_factors': model.utilization_factors,
-        'summary': {
-            'total_substations': len(loads),
-            'high_load': high_load,
-            'medium_load': medium_load,
-            'low_load': len(loads) - high_load - medium_load,
-            'total_plants': len(model.power_plants),
-            'total_generation_mw': sum(s['generation_mw'] for s in loads),
-            'total_load_mw': sum(s['load_mw'] for s in loads),
-        }
+        'power_plants': power_plants,
+        'utilization_factors': utilization_factors,
+        'summary': summary,
     }
 
 
 if __name__ == '__main__':
+    # Use the importable module's classes, so the pickle caches written here
+    # reference substation_load_model.PowerPlant rather than __main__'s
+    from substation_load_model import SubstationLoadModel
+    
     model = SubstationLoadModel()
     results = model.run()
     